@@ -1,75 +1,149 @@
-from utils import extract_contact_info
+from utils import extract_contact_info, http_client, send_with_retry
+from cache import APOLLO_CONTACTS_CACHE_TTL
 from fastapi import HTTPException
-import requests
+from collections import deque
+import cache
+import asyncio
+import math
+import orjson
+
+APOLLO_CONTACTS_SEARCH_URL = "https://api.apollo.io/api/v1/contacts/search"
+MAX_CONCURRENT_PAGES = 8
+
+
+async def fetch_page(client, headers, payload, page, bypass_cache=False):
+    """Fetch a single page of the Apollo contact search, served from cache when possible"""
+    key = cache.make_key(APOLLO_CONTACTS_SEARCH_URL, {**payload, "page": page, "api_key": headers["X-Api-Key"]})
+    return await cache.cached(
+        key,
+        APOLLO_CONTACTS_CACHE_TTL,
+        lambda: request_contacts_page(client, headers, payload, page),
+        bypass=bypass_cache
+    )
+
+
+async def request_contacts_page(client, headers, payload, page):
+    """A page trimmed to the contact fields we use, so the cache doesn't hold Apollo's full raw records"""
+    page_data = await request_page(client, headers, payload, page)
+    return {
+        "contacts": [extract_contact_info(c) for c in page_data.get("contacts") or []],
+        "pagination": page_data.get("pagination")
+    }
+
+
+async def request_page(client, headers, payload, page):
+    try:
+        r = await send_with_retry(
+            lambda: client.post(APOLLO_CONTACTS_SEARCH_URL, headers=headers, content=orjson.dumps({**payload, "page": page}))
+        )
+
+        if r.status_code == 401:
+            raise HTTPException(
+                status_code=401, 
+                detail=f"Unauthorized: {r.text}. Check your API key and credits."
+            )
+        elif r.status_code == 403:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Forbidden: {r.text}. Check your subscription plan."
+            )
+        elif r.status_code == 429:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limited: {r.text}. Wait and try again."
+            )
+        r.raise_for_status()
+        return orjson.loads(r.content)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Apollo API Error: {str(e)}")
+
+
+async def iter_contacts(data, client=None):
+    """
+    Stream contacts from Apollo, in page order.
+    The first page tells us how many pages exist; the remaining pages are
+    requested concurrently, at most MAX_CONCURRENT_PAGES ahead of the consumer,
+    and each one is yielded as soon as it and the pages before it have arrived.
+    """
+    if data.total_records <= 0:
+        return
 
-def fetch_contacts(data):
     titles = data.person_titles
     keywords = data.organization_keywords
     locations = data.organization_locations
     employee_ranges = data.organization_num_employees_ranges
 
-    url = "https://api.apollo.io/api/v1/contacts/search"
     headers = {
         "Cache-Control": "no-cache",
         "Content-Type": "application/json"
     }
 
     headers["X-Api-Key"] = data.api_key
-    all_contacts = []
-    page = data.start_page
+    start_page = data.start_page or 1
     per_page = data.per_page or 1
+    if start_page == 1:
+        # Don't ask for more than we keep; only safe from page 1, since per_page shifts page offsets
+        per_page = min(per_page, data.total_records)
+
+    payload = {"per_page": per_page}
+    
+    if data.q_keywords:
+        payload["q_keywords"] = data.q_keywords
+    if titles:
+        payload["q_titles"] = titles  
+    if keywords:
+        payload["q_organization_keywords"] = keywords 
+    if locations:
+        payload["q_organization_locations"] = locations 
+    if employee_ranges:
+        payload["q_organization_num_employees_ranges"] = employee_ranges  
+
+    async with http_client(client) as client:
+        first_page = await fetch_page(client, headers, payload, start_page, data.cache_bypass)
+        pages = iter(())
+
+        if first_page.get("contacts") and per_page < data.total_records:
+            last_page = start_page + math.ceil(data.total_records / per_page) - 1
+            total_pages = (first_page.get("pagination") or {}).get("total_pages")
+            if total_pages:
+                last_page = min(last_page, total_pages)
+            pages = iter(range(start_page + 1, last_page + 1))
+
+        # Sliding window: at most MAX_CONCURRENT_PAGES pages in flight or waiting to be consumed
+        tasks = deque()
 
-    while len(all_contacts) < data.total_records:
-        payload = {
-            "page": page,
-            "per_page": per_page
-        }
-        
-        if data.q_keywords:
-            payload["q_keywords"] = data.q_keywords
-        if titles:
-            payload["q_titles"] = titles  
-        if keywords:
-            payload["q_organization_keywords"] = keywords 
-        if locations:
-            payload["q_organization_locations"] = locations 
-        if employee_ranges:
-            payload["q_organization_num_employees_ranges"] = employee_ranges  
+        def fetch_next():
+            if (page := next(pages, None)) is not None:
+                tasks.append(asyncio.create_task(fetch_page(client, headers, payload, page, data.cache_bypass)))
+
+        for _ in range(MAX_CONCURRENT_PAGES):
+            fetch_next()
+
+        async def ordered_pages():
+            yield first_page
+            while tasks:
+                page_data = await tasks.popleft()
+                fetch_next()
+                yield page_data
+
+        remaining = data.total_records
         try:
-            r = requests.post(url, headers=headers, json=payload)
-            
-            if r.status_code == 401:
-                raise HTTPException(
-                    status_code=401, 
-                    detail=f"Unauthorized: {r.text}. Check your API key and credits."
-                )
-            elif r.status_code == 403:
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"Forbidden: {r.text}. Check your subscription plan."
-                )
-            elif r.status_code == 429:
-                raise HTTPException(
-                    status_code=429,
-                    detail=f"Rate limited: {r.text}. Wait and try again."
-                )
-            r.raise_for_status()
-            response_data = r.json()
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Apollo API Error: {str(e)}")
-
-        contacts = response_data.get("contacts", [])
-        
-        if not contacts:
-            break
-
-        for c in contacts:
-            normalized = extract_contact_info(c)
-            all_contacts.append(normalized)
-
-        page += 1
-
-    return all_contacts[:data.total_records]
\ No newline at end of file
+            async for page_data in ordered_pages():
+                contacts = page_data.get("contacts", [])[:remaining]
+                for c in contacts:
+                    # A copy, so callers never modify the cached page
+                    yield dict(c)
+                remaining -= len(contacts)
+                if remaining <= 0:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def fetch_contacts(data, client=None):
+    """Fetch contacts from Apollo as a list"""
+    return [c async for c in iter_contacts(data, client)]
\ No newline at end of file
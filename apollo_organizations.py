@@ -1,5 +1,13 @@
+from cache import APOLLO_CACHE_TTL
+from utils import http_client, send_with_retry, send_with_retry_sync, gather_limited
 from fastapi import HTTPException
-import requests
+import httpx
+import cache
+import orjson
+
+session = httpx.Client(http2=True, timeout=30.0, limits=httpx.Limits(max_keepalive_connections=20))
+
+MAX_CONCURRENT_ORGANIZATIONS = 10
 
 def search_organizations(api_key, keywords=None, locations=None, industries=None, company_sizes=None, limit=10):
     url = "https://api.apollo.io/api/v1/organizations/search"
@@ -42,9 +50,14 @@ def search_organizations(api_key, keywords=None, locations=None, industries=None
         payload["q_organization_industries"] = industries
     if company_sizes:
         payload["q_organization_num_employees_ranges"] = company_sizes
+
+    key = cache.make_key(url, {**payload, "api_key": api_key})
+    cached_orgs = cache.get(key)
+    if cached_orgs is not None:
+        return cached_orgs
     
     try:
-        r = requests.post(url, headers=headers, json=payload)
+        r = send_with_retry_sync(lambda: session.post(url, headers=headers, content=orjson.dumps(payload)))
 
         if r.status_code == 401:
             raise HTTPException(status_code=401, detail="Unauthorized. Check your Apollo API key.")
@@ -54,7 +67,7 @@ def search_organizations(api_key, keywords=None, locations=None, industries=None
             raise HTTPException(status_code=429, detail="Rate limit exceeded. Try again later.")
         
         r.raise_for_status()
-        response_data = r.json()
+        response_data = orjson.loads(r.content)
         
         organizations = response_data.get("organizations", [])
         if not organizations:
@@ -75,6 +88,7 @@ def search_organizations(api_key, keywords=None, locations=None, industries=None
                 "linkedin_url": org.get("linkedin_url")
             })
         
+        cache.set(key, formatted_orgs, APOLLO_CACHE_TTL)
         return formatted_orgs
         
     except HTTPException:
@@ -83,9 +97,8 @@ def search_organizations(api_key, keywords=None, locations=None, industries=None
         raise HTTPException(status_code=500, detail=f"Apollo Organizations API Error: {str(e)}")
 
 
-def get_organization_top_people(api_key, organization_id):
-    """Get top people from an organization (free tier)"""
-    
+def top_people_request(api_key, organization_id):
+    """URL, headers, payload and cache key for an organization's top people"""
     url = "https://api.apollo.io/api/v1/mixed_people/organization_top_people"
     headers = {
         "Cache-Control": "no-cache",
@@ -98,28 +111,79 @@ def get_organization_top_people(api_key, organization_id):
         "page": 1,
         "per_page": 25
     }
+
+    key = cache.make_key(url, {**payload, "api_key": api_key})
+    return url, headers, payload, key
+
+
+def format_people(response_data):
+    """Keep the fields the app shows for each person"""
+    formatted_people = []
+    for person in response_data.get("people", []):
+        formatted_people.append({
+            "id": person.get("id"),
+            "first_name": person.get("first_name"),
+            "last_name": person.get("last_name"),
+            "title": person.get("title"),
+            "email": person.get("email"),
+            "phone": person.get("phone"),
+            "linkedin_url": person.get("linkedin_url"),
+            "organization_name": (
+                person.get("organization", {}).get("name") if person.get("organization") else None
+            )
+        })
+    return formatted_people
+
+
+def get_organization_top_people(api_key, organization_id):
+    """Get top people from an organization (free tier)"""
+    url, headers, payload, key = top_people_request(api_key, organization_id)
+    cached_people = cache.get(key)
+    if cached_people is not None:
+        return cached_people
     
     try:
-        r = requests.post(url, headers=headers, json=payload)
+        r = send_with_retry_sync(lambda: session.post(url, headers=headers, content=orjson.dumps(payload)))
         r.raise_for_status()
-        response_data = r.json()
+        formatted_people = format_people(orjson.loads(r.content))
+        cache.set(key, formatted_people, APOLLO_CACHE_TTL)
+        return formatted_people
         
-        people = response_data.get("people", [])
-        formatted_people = []
-        for person in people:
-            formatted_people.append({
-                "id": person.get("id"),
-                "first_name": person.get("first_name"),
-                "last_name": person.get("last_name"),
-                "title": person.get("title"),
-                "email": person.get("email"),
-                "phone": person.get("phone"),
-                "linkedin_url": person.get("linkedin_url"),
-                "organization_name": (
-                    person.get("organization", {}).get("name") if person.get("organization") else None
-                )
-            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Apollo Top People API Error: {str(e)}")
+
+
+async def get_organization_top_people_async(api_key, organization_id, client):
+    """Async counterpart of get_organization_top_people on a shared httpx client"""
+    url, headers, payload, key = top_people_request(api_key, organization_id)
+    cached_people = cache.get(key)
+    if cached_people is not None:
+        return cached_people
+    
+    try:
+        r = await send_with_retry(lambda: client.post(url, headers=headers, content=orjson.dumps(payload)))
+        r.raise_for_status()
+        formatted_people = format_people(orjson.loads(r.content))
+        cache.set(key, formatted_people, APOLLO_CACHE_TTL)
         return formatted_people
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Apollo Top People API Error: {str(e)}")
+
+
+async def get_top_people_for_organizations(api_key, organization_ids, client=None):
+    """
+    Get top people for many organizations concurrently, at most
+    MAX_CONCURRENT_ORGANIZATIONS requests at a time.
+    Returns {organization_id: people}; an organization whose lookup failed
+    maps to its HTTPException instead.
+    """
+    async def top_people_or_error(organization_id):
+        try:
+            return await get_organization_top_people_async(api_key, organization_id, client)
+        except HTTPException as e:
+            return e
+
+    async with http_client(client) as client:
+        results = await gather_limited([top_people_or_error(org_id) for org_id in organization_ids], MAX_CONCURRENT_ORGANIZATIONS)
+    return dict(zip(organization_ids, results))
@@ -1,28 +1,84 @@
-from hubspot import push_contacts_async, push_companies_async, push_people_to_companies_async
-from apollo_organizations import search_organizations, get_organization_top_people
+from hubspot import push_contacts_batch, push_companies_async, push_people_to_companies_async
+from apollo_organizations import search_organizations, get_organization_top_people, get_top_people_for_organizations
 from hunter import verify_contacts_async
 from utils import extract_contact_info
 from apollo import fetch_contacts
 from typing import List, Optional
-import plotly.graph_objects as go
 from models import FetchRequest
+from collections import deque
 from datetime import datetime
-import plotly.express as px
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import warnings
-import requests
+import math
 import asyncio
 import httpx
-import json
+import threading
+import gzip
+import sys
+import io
+import orjson
+import uuid
 
-try:
-    from st_aggrid import AgGrid, GridOptionsBuilder
-    from st_aggrid.shared import GridUpdateMode
-    AGGrid_AVAILABLE = True
-except ImportError:
-    AGGrid_AVAILABLE = False
-    st.warning("streamlit_aggrid not available. Using basic table display.")
+ORGS_PER_PAGE = 10
+AGGRID_MAX_ROWS = 500
+SEARCH_HISTORY_SIZE = 100
+MAX_FILTER_VALUES = 15
+GZIP_DOWNLOAD_THRESHOLD = 1024 * 1024
+INTERNED_CONTACT_FIELDS = ('hunter_result', 'verification_source', 'organization', 'title', 'email_status')
+CATEGORICAL_CONTACT_COLUMNS = ('Verification Result', 'Verified By', 'Email Status', 'Organization', 'Title')
+ARROW_STRING_CONTACT_COLUMNS = ('First Name', 'Last Name', 'Email', 'Phone')
+
+ORG_INDUSTRY_OPTIONS = (
+    "Technology", "Software", "SaaS", "Fintech", "Healthcare", "Biotech",
+    "Education", "E-learning", "Finance", "Banking", "Insurance",
+    "Real Estate", "Construction", "Manufacturing", "Retail", "E-commerce",
+    "Media", "Entertainment", "Gaming", "Marketing", "Advertising",
+    "Consulting", "Legal", "Government", "Non-profit", "Energy"
+)
+
+ORG_LOCATION_OPTIONS = (
+    "San Francisco", "New York", "Los Angeles", "Chicago", "Boston", "Seattle",
+    "Austin", "Denver", "Miami", "Atlanta", "Dallas", "Houston", "Phoenix",
+    "Remote", "United States", "Canada", "United Kingdom", "Germany"
+)
+
+COMPANY_SIZE_OPTIONS = (
+    "1-10", "11-50", "51-200", "201-500", "501-1000",
+    "1001-5000", "5001-10000", "10000+"
+)
+
+JOB_TITLE_OPTIONS = (
+    "CEO", "CTO", "CFO", "COO", "President", "Vice President",
+    "Manager", "Project Manager", "Director", "Senior Director",
+    "Software Engineer", "Senior Software Engineer", "Lead Engineer",
+    "Product Manager", "Marketing Manager", "Sales Manager",
+    "Account Manager", "Business Development", "Operations Manager",
+    "HR Manager", "Finance Manager", "General Manager",
+    "Founder", "Co-Founder", "Owner", "Partner", "Consultant",
+    "Analyst", "Specialist", "Coordinator", "Supervisor",
+    "Administrative Assistant", "Executive Assistant"
+)
+
+CONTACT_INDUSTRY_OPTIONS = (
+    "Technology", "Software", "SaaS", "Fintech", "Healthcare", "Biotech",
+    "Education", "E-learning", "Finance", "Banking", "Insurance",
+    "Real Estate", "Construction", "Manufacturing", "Retail", "E-commerce",
+    "Media", "Entertainment", "Gaming", "Marketing", "Advertising",
+    "Consulting", "Legal", "Government", "Non-profit", "Energy",
+    "Transportation", "Automotive", "Aerospace", "Telecommunications",
+    "Food & Beverage", "Fashion", "Beauty", "Travel", "Hospitality"
+)
+
+CONTACT_LOCATION_OPTIONS = (
+    "San Francisco", "New York", "Los Angeles", "Chicago", "Boston", "Seattle",
+    "Austin", "Denver", "Miami", "Atlanta", "Dallas", "Houston", "Phoenix",
+    "Philadelphia", "San Diego", "Portland", "Nashville", "Las Vegas",
+    "Remote", "United States", "Canada", "United Kingdom", "Germany",
+    "France", "Netherlands", "Australia", "Singapore", "India", "Brazil"
+)
 
 
 st.set_page_config(
@@ -72,12 +128,86 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_event_loop():
+    """One background event loop for the whole app, so pooled connections outlive a button click"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="lead-hunter-loop", daemon=True).start()
+    return loop
+
+@st.cache_resource
+def get_http_client():
+    """Shared HTTP/2 client for Apollo, Hunter and HubSpot; only used on get_event_loop()"""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+    )
+
+def run_async(coro):
+    """Run a coroutine on the background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Encode a DataFrame as CSV bytes with Arrow's C++ writer, straight into a buffer"""
+    try:
+        buf = io.BytesIO()
+        pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    except pa.ArrowException:
+        # Mixed-type columns can't become Arrow arrays and list/struct columns can't be written as CSV; pandas writes them as-is
+        buf = io.BytesIO()
+        df.to_csv(buf, index=False)
+    return buf.getvalue()
+
+def compressed_download(data: bytes, file_name: str, mime: str):
+    """Gzip exports larger than GZIP_DOWNLOAD_THRESHOLD; returns the (data, file_name, mime) to download"""
+    if len(data) < GZIP_DOWNLOAD_THRESHOLD:
+        return data, file_name, mime
+    return gzip.compress(data, compresslevel=1), f"{file_name}.gz", "application/gzip"
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def contacts_csv(_df: pd.DataFrame, version: str) -> bytes:
+    """CSV export of the contacts frame, encoded once per contacts version"""
+    return to_csv_bytes(_df)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def contacts_json(_contacts: List[dict], version: str) -> bytes:
+    """JSON export of the contacts, encoded once per contacts version"""
+    return orjson.dumps(_contacts, option=orjson.OPT_INDENT_2)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def history_dataframe(_history: deque, version: str) -> pd.DataFrame:
+    """Search history table, built once per history version"""
+    return pd.DataFrame(list(_history))
+
+def people_markdown(people: List[dict]) -> str:
+    """Render a people list as one markdown block instead of several elements per person"""
+    lines = []
+    for person in people:
+        lines.append(f"- **{person.get('first_name', '')} {person.get('last_name', '')}** - {person.get('title', 'N/A')}")
+        if person.get('email'):
+            lines.append(f"    - 📧 {person['email']}")
+        if person.get('linkedin_url'):
+            lines.append(f"    - 🔗 [LinkedIn]({person['linkedin_url']})")
+    return "\n".join(lines)
+
+@st.cache_resource(show_spinner=False)
+def aggrid_available() -> bool:
+    """Whether streamlit_aggrid can be imported; checked once, on first use of the results table"""
+    try:
+        import st_aggrid
+        return True
+    except ImportError:
+        return False
+
 def initialize_session_state():
     """Initialize session state variables"""
     if 'contacts_data' not in st.session_state:
         st.session_state.contacts_data = []
+        st.session_state.contacts_version = ''
     if 'search_history' not in st.session_state:
-        st.session_state.search_history = []
+        st.session_state.search_history = deque(maxlen=SEARCH_HISTORY_SIZE)
+        st.session_state.search_history_version = ''
     if 'api_keys' not in st.session_state:
         st.session_state.api_keys = {
             'apollo': '',
@@ -98,12 +228,22 @@ def save_api_keys():
 def load_api_keys():
     return st.session_state.api_keys
 
-def create_contact_dataframe(contacts: List[dict]) -> pd.DataFrame:
-    """Convert contacts list to pandas DataFrame"""
-    if not contacts:
+def set_contacts(contacts: List[dict]):
+    """Replace the contacts in session state and give them a new version for the cached views"""
+    for contact in contacts:
+        for field in INTERNED_CONTACT_FIELDS:
+            value = contact.get(field)
+            if isinstance(value, str):
+                contact[field] = sys.intern(value)
+    st.session_state.contacts_data = contacts
+    st.session_state.contacts_version = uuid.uuid4().hex
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def create_contact_dataframe(_contacts: List[dict], version: str) -> pd.DataFrame:
+    """Convert contacts list to pandas DataFrame, cached per contacts version"""
+    if not _contacts:
         return pd.DataFrame()
     
-    df = pd.DataFrame(contacts)
     display_columns = {
         'first_name': 'First Name',
         'last_name': 'Last Name',
@@ -113,134 +253,181 @@ def create_contact_dataframe(contacts: List[dict]) -> pd.DataFrame:
         'phone': 'Phone',
         'email_status': 'Email Status',
         'hunter_result': 'Verification Result',
+        'verification_source': 'Verified By',
         'hunter_score': 'Verification Score'
     }
     
-    available_columns = {k: v for k, v in display_columns.items() if k in df.columns}
-    df_display = df[list(available_columns.keys())].copy()
-    df_display = df_display.rename(columns=available_columns)
+    # Build column by column, only for displayed fields, instead of letting pandas normalize every dict
+    present = set().union(*_contacts)
+    df_display = pd.DataFrame({
+        label: [contact.get(field) for contact in _contacts]
+        for field, label in display_columns.items()
+        if field in present
+    })
+    
+    for column in CATEGORICAL_CONTACT_COLUMNS:
+        if column in df_display.columns:
+            df_display[column] = df_display[column].astype('category')
+    # Mostly-unique strings stay Arrow buffers instead of one Python object per cell
+    for column in ARROW_STRING_CONTACT_COLUMNS:
+        if column in df_display.columns:
+            df_display[column] = df_display[column].astype('string[pyarrow]')
     
     return df_display
 
-def display_contact_metrics(contacts: List[dict]):
+def contact_column(df: pd.DataFrame, name: str, missing: Optional[str] = None) -> pd.Series:
+    """
+    A column of the contacts frame with blanks as missing, or filled with `missing` if given.
+    All missing if no contact has the field.
+    """
+    if name not in df.columns:
+        column = pd.Series(index=df.index, dtype=object)
+    elif isinstance(df[name].dtype, pd.CategoricalDtype):
+        categories = df[name].cat.categories
+        column = df[name].cat.remove_categories(categories[categories == ''])
+    else:
+        column = df[name].mask(df[name] == '')
+    
+    if missing is not None:
+        if isinstance(column.dtype, pd.CategoricalDtype) and missing not in column.cat.categories:
+            column = column.cat.add_categories([missing])
+        column = column.fillna(missing)
+    return column
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def contact_metrics(_df: pd.DataFrame, version: str) -> dict:
+    """Aggregate the contact KPIs once per contacts version"""
+    df = _df
+    scores = pd.to_numeric(contact_column(df, 'Verification Score'), errors='coerce')
+    return {
+        'total': len(df),
+        'verified': int((contact_column(df, 'Verification Result') == 'deliverable').sum()),
+        'unique_orgs': int(contact_column(df, 'Organization').nunique()),
+        'score_sum': float(scores.sum()),
+        'scored': int(scores.notna().sum())
+    }
+
+def display_contact_metrics(df: pd.DataFrame, version: str):
     """Display key metrics about the contacts"""
-    if not contacts:
+    if df.empty:
         return
     
+    metrics = contact_metrics(df, version)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Contacts", len(contacts))
+        st.metric("Total Contacts", metrics['total'])
     
     with col2:
-        verified = len([c for c in contacts if c.get('hunter_result') == 'deliverable'])
-        st.metric("Verified Emails", verified)
+        st.metric("Verified Emails", metrics['verified'])
     
     with col3:
-        unique_orgs = len(set([c.get('organization', '') for c in contacts if c.get('organization')]))
-        st.metric("Unique Organizations", unique_orgs)
+        st.metric("Unique Organizations", metrics['unique_orgs'])
     
     with col4:
-        avg_score = sum([c.get('hunter_score', 0) for c in contacts if c.get('hunter_score')]) / len(contacts) if contacts else 0
-        st.metric("Avg Verification Score", f"{avg_score:.1f}")
+        # Apollo-verified contacts have no Hunter score
+        avg_score = metrics['score_sum'] / metrics['scored'] if metrics['scored'] else None
+        st.metric("Avg Verification Score", f"{avg_score:.1f}" if avg_score is not None else "N/A")
 
-def display_contact_visualizations(contacts: List[dict]):
-    """Display visualizations for the contacts data"""
-    if not contacts:
-        return
-    col1, col2 = st.columns([1, 2])
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_contact_figures(_df: pd.DataFrame, version: str):
+    """Build the verification and organization pie charts, cached per contacts version"""
+    import plotly.express as px
+    df = _df
+    # Categorical columns also count unused categories, so keep only the ones present
+    verification_status = contact_column(df, 'Verification Result').value_counts(sort=False)
+    verification_status = verification_status[verification_status > 0]
+    org_counts = contact_column(df, 'Organization', missing='Unknown').value_counts()
+    org_counts = org_counts[org_counts > 0]
 
-    with col1:
-        verification_status = {}
-        for contact in contacts:
-            status = contact.get('hunter_result') or None
-            if status:
-                verification_status[status] = verification_status.get(status, 0) + 1
-
-        if not verification_status:
-            pass
-
-        labels = list(verification_status.keys())
-        values = list(verification_status.values())
-
-        total_vals = sum(values)
-        if total_vals != len(contacts) and len(contacts) > 0:
-            factor = len(contacts) / total_vals
-            values = [max(0, int(v * factor)) for v in values]
-
-        import pandas as _pd
-        df_ver = _pd.DataFrame({
-            'status': labels,
-            'count': values
-        })
+    labels = verification_status.index.tolist()
+    values = verification_status.tolist()
 
-        color_map = {
-            'deliverable': '#2ECC71',   
-            'risky': '#F1C40F',         
-            'undeliverable': '#E67E22', 
-            'unknown': '#E74C3C'       
-        }
+    total_vals = sum(values)
+    if total_vals and total_vals != len(df):
+        factor = len(df) / total_vals
+        values = [max(0, int(v * factor)) for v in values]
+
+    import pandas as _pd
+    df_ver = _pd.DataFrame({
+        'status': labels,
+        'count': values
+    })
+
+    color_map = {
+        'deliverable': '#2ECC71',   
+        'risky': '#F1C40F',         
+        'undeliverable': '#E67E22', 
+        'unknown': '#E74C3C'       
+    }
+
+    unique_statuses = df_ver['status'].unique().tolist()
+    for s in unique_statuses:
+        if s not in color_map:
+            color_map[s] = '#95A5A6'
+
+    verification_fig = px.pie(
+        df_ver,
+        names='status',
+        values='count',
+        hole=0.45,
+        title='Email Verification',
+        color='status',
+        color_discrete_map=color_map
+    )
+
+    verification_fig.update_traces(textposition='inside', textinfo='percent')
 
-        unique_statuses = df_ver['status'].unique().tolist()
-        for s in unique_statuses:
-            if s not in color_map:
-                color_map[s] = '#95A5A6'
+    if 'deliverable' in df_ver['status'].values and df_ver['count'].sum() > 0:
+        dval = int(df_ver.loc[df_ver['status'] == 'deliverable', 'count'].sum())
+        dpct = dval / df_ver['count'].sum() * 100
+        center_text = f"{dpct:.0f}%\nDeliverable"
+        verification_fig.update_layout(annotations=[dict(text=center_text, x=0.5, y=0.5, font_size=18, showarrow=False)])
+
+    verification_fig.update_layout(
+        template='plotly_dark',
+        margin=dict(l=10, r=10, t=40, b=10),
+        legend=dict(orientation='v', y=0.5, x=1.02)
+    )
+
+    org_fig = None
+    if not org_counts.empty:
+        top_orgs = org_counts.head(12)
+        org_names = top_orgs.index.tolist()[::-1]  # reverse for horizontal bar
+        org_values = top_orgs.tolist()[::-1]
+
+        df_org = _pd.DataFrame({
+            'organization': org_names,
+            'count': org_values
+        })
+        total_shown = df_org['count'].sum()
+        df_org['percent'] = df_org['count'].apply(lambda v: (v / total_shown * 100) if total_shown else 0)
 
-        fig = px.pie(
-            df_ver,
-            names='status',
+        org_fig = px.pie(
+            df_org,
+            names='organization',
             values='count',
             hole=0.45,
-            title='Email Verification',
-            color='status',
-            color_discrete_map=color_map
+            title='Top Organizations (by contact share)'
         )
+        org_fig.update_traces(textposition='inside', textinfo='percent', hovertemplate='%{label}<br>Contacts: %{value}<br>Percent: %{percent}<extra></extra>')
+        org_fig.update_layout(template='plotly_dark', margin=dict(l=10, r=200, t=40, b=20))
 
-        fig.update_traces(textposition='inside', textinfo='percent')
+    return verification_fig, org_fig
 
-        if 'deliverable' in df_ver['status'].values and df_ver['count'].sum() > 0:
-            dval = int(df_ver.loc[df_ver['status'] == 'deliverable', 'count'].sum())
-            dpct = dval / df_ver['count'].sum() * 100
-            center_text = f"{dpct:.0f}%\nDeliverable"
-            fig.update_layout(annotations=[dict(text=center_text, x=0.5, y=0.5, font_size=18, showarrow=False)])
+def display_contact_visualizations(df: pd.DataFrame, version: str):
+    """Display visualizations for the contacts data"""
+    if df.empty:
+        return
+    verification_fig, org_fig = build_contact_figures(df, version)
+    col1, col2 = st.columns([1, 2])
 
-        fig.update_layout(
-            template='plotly_dark',
-            margin=dict(l=10, r=10, t=40, b=10),
-            legend=dict(orientation='v', y=0.5, x=1.02)
-        )
-        st.plotly_chart(fig, use_container_width=True, height=360)
+    with col1:
+        st.plotly_chart(verification_fig, use_container_width=True, height=360)
 
     with col2:
-        org_counts = {}
-        for contact in contacts:
-            org = contact.get('organization') or 'Unknown'
-            if org:
-                org_counts[org] = org_counts.get(org, 0) + 1
-
-        if org_counts:
-            top_orgs = sorted(org_counts.items(), key=lambda x: x[1], reverse=True)[:12]
-            org_names = [o[0] for o in top_orgs][::-1]  # reverse for horizontal bar
-            org_values = [o[1] for o in top_orgs][::-1]
-
-            import pandas as _pd
-            df_org = _pd.DataFrame({
-                'organization': org_names,
-                'count': org_values
-            })
-            total_shown = df_org['count'].sum()
-            df_org['percent'] = df_org['count'].apply(lambda v: (v / total_shown * 100) if total_shown else 0)
-
-            fig = px.pie(
-                df_org,
-                names='organization',
-                values='count',
-                hole=0.45,
-                title='Top Organizations (by contact share)'
-            )
-            fig.update_traces(textposition='inside', textinfo='percent', hovertemplate='%{label}<br>Contacts: %{value}<br>Percent: %{percent}<extra></extra>')
-            fig.update_layout(template='plotly_dark', margin=dict(l=10, r=200, t=40, b=20))
-            st.plotly_chart(fig, use_container_width=True, height=420)
+        if org_fig is not None:
+            st.plotly_chart(org_fig, use_container_width=True, height=420)
 
 def main():
     initialize_session_state()
@@ -319,9 +506,8 @@ def main():
             st.subheader("📊 Session Stats")
             st.metric("Organizations Found", len(st.session_state.organizations_data))
             
-            total_people = sum([len(st.session_state.get(f"people_{org['id']}", [])) 
-                              for org in st.session_state.organizations_data 
-                              if f"people_{org['id']}" in st.session_state])
+            total_people = sum(len(st.session_state.get(f"people_{org['id']}", ()))
+                               for org in st.session_state.organizations_data)
             if total_people > 0:
                 st.metric("People Discovered", total_people)
     
@@ -395,42 +581,23 @@ def organization_search_page():
         with col2:
             st.subheader("Filters")
             
-            industry_options = [
-                "Technology", "Software", "SaaS", "Fintech", "Healthcare", "Biotech",
-                "Education", "E-learning", "Finance", "Banking", "Insurance",
-                "Real Estate", "Construction", "Manufacturing", "Retail", "E-commerce",
-                "Media", "Entertainment", "Gaming", "Marketing", "Advertising",
-                "Consulting", "Legal", "Government", "Non-profit", "Energy"
-            ]
-
             selected_industries = st.multiselect(
                 "Select Industries", 
-                options=industry_options, 
+                options=ORG_INDUSTRY_OPTIONS, 
                 default=[],
                 help="Select industries to filter organizations by"
             )
             
-            location_options = [
-                "San Francisco", "New York", "Los Angeles", "Chicago", "Boston", "Seattle",
-                "Austin", "Denver", "Miami", "Atlanta", "Dallas", "Houston", "Phoenix",
-                "Remote", "United States", "Canada", "United Kingdom", "Germany"
-            ]
-            
             selected_locations = st.multiselect(
                 "Select Locations", 
-                options=location_options, 
+                options=ORG_LOCATION_OPTIONS, 
                 default=[],
                 help="Select geographic locations to filter by"
             )
             
-            size_options = [
-                "1-10", "11-50", "51-200", "201-500", "501-1000", 
-                "1001-5000", "5001-10000", "10000+"
-            ]
-            
             selected_sizes = st.multiselect(
                 "Select Company Sizes", 
-                options=size_options, 
+                options=COMPANY_SIZE_OPTIONS, 
                 default=[],
                 help="Select company size ranges to filter by"
             )
@@ -464,6 +631,7 @@ def organization_search_page():
                 )
                 
                 st.session_state.organizations_data = organizations
+                st.session_state.pop("org_page", None)  # New results start at page 1
                 st.success(f"Found {len(organizations)} organizations!")
                 
             except Exception as e:
@@ -480,7 +648,7 @@ def organization_search_page():
             if st.button("🏢 Push All Organizations to HubSpot", disabled=not st.session_state.get('hubspot_key')):
                 with st.spinner("Pushing organizations to HubSpot..."):
                     try:
-                        hubspot_results = asyncio.run(push_companies_async(organizations, st.session_state.hubspot_key))
+                        hubspot_results = run_async(push_companies_async(organizations, st.session_state.hubspot_key, get_http_client()))
                         successful = len([r for r in hubspot_results if 'error' not in r])
                         st.success(f"✅ Pushed {successful} organizations to HubSpot!")
                         
@@ -496,7 +664,7 @@ def organization_search_page():
             if st.button("📊 Export Organizations as CSV"):
                 if organizations:
                     df = pd.DataFrame(organizations)
-                    csv = df.to_csv(index=False)
+                    csv = to_csv_bytes(df)
                     st.download_button(
                         label="Download CSV",
                         data=csv,
@@ -508,95 +676,121 @@ def organization_search_page():
             if st.button("🔄 Refresh Data"):
                 st.rerun()
         
+        if st.button("👥 Get Top People for ALL"):
+            with st.spinner("Getting top people for all organizations..."):
+                results = run_async(get_top_people_for_organizations(
+                    st.session_state.apollo_key,
+                    [org['id'] for org in organizations],
+                    get_http_client()
+                ))
+                failed = 0
+                for org_id, people in results.items():
+                    if isinstance(people, Exception):
+                        failed += 1
+                        continue
+                    st.session_state[f"people_{org_id}"] = people
+                st.success(f"Got top people for {len(results) - failed} organizations!")
+                if failed:
+                    st.warning(f"Could not get top people for {failed} organizations.")
+        
         st.markdown("---")
         st.subheader("📊 Found Organizations")
         
-        for i, org in enumerate(organizations):
-            with st.expander(f"🏢 {org.get('name', 'Unknown Company')}"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write(f"**Industry:** {org.get('industry', 'N/A')}")
-                    st.write(f"**Size:** {org.get('estimated_num_employees', 'N/A')} employees")
-                    st.write(f"**Location:** {org.get('city', 'N/A')}, {org.get('state', 'N/A')}")
-                
-                with col2:
-                    if org.get('website_url'):
-                        st.write(f"**Website:** [{org['website_url']}]({org['website_url']})")
-                    if org.get('linkedin_url'):
-                        st.write(f"**LinkedIn:** [{org['linkedin_url']}]({org['linkedin_url']})")
-                    if org.get('phone'):
-                        st.write(f"**Phone:** {org['phone']}")
-                
-                col_btn1, col_btn2, col_btn3 = st.columns(3)
+        page_count = math.ceil(len(organizations) / ORGS_PER_PAGE)
+        page = 1
+        if page_count > 1:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, key="org_page")
+        start = (page - 1) * ORGS_PER_PAGE
+        
+        for i, org in enumerate(organizations[start:start + ORGS_PER_PAGE], start):
+            render_organization_card(i, org)
+
+@st.fragment
+def render_organization_card(i: int, org: dict):
+    """One organization expander; its buttons rerun only this card, not the whole page"""
+    with st.expander(f"🏢 {org.get('name', 'Unknown Company')}"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write(f"**Industry:** {org.get('industry', 'N/A')}")
+            st.write(f"**Size:** {org.get('estimated_num_employees', 'N/A')} employees")
+            st.write(f"**Location:** {org.get('city', 'N/A')}, {org.get('state', 'N/A')}")
+        
+        with col2:
+            if org.get('website_url'):
+                st.write(f"**Website:** [{org['website_url']}]({org['website_url']})")
+            if org.get('linkedin_url'):
+                st.write(f"**LinkedIn:** [{org['linkedin_url']}]({org['linkedin_url']})")
+            if org.get('phone'):
+                st.write(f"**Phone:** {org['phone']}")
+        
+        col_btn1, col_btn2, col_btn3 = st.columns(3)
+        
+        with col_btn1:
+            if st.button(f"👥 Get Top People", key=f"people_{i}"):
+                with st.spinner("Getting top people..."):
+                    try:
+                        people = get_organization_top_people(
+                            api_key=st.session_state.apollo_key,
+                            organization_id=org['id']
+                        )
+                        
+                        st.session_state[f"people_{org['id']}"] = people
+                        
+                        if people:
+                            st.success(f"Found {len(people)} top people!")
+                        else:
+                            st.info("No top people found for this organization.")
+                            
+                    except Exception as e:
+                        st.error(f"Error getting top people: {str(e)}")
+        
+        if f"people_{org['id']}" in st.session_state:
+            people = st.session_state[f"people_{org['id']}"]
+            if people:
+                st.markdown("**👥 Top People:**")
+                st.markdown(people_markdown(people))
                 
-                with col_btn1:
-                    if st.button(f"👥 Get Top People", key=f"people_{i}"):
-                        with st.spinner("Getting top people..."):
+                with col_btn2:
+                    if st.button(f"📤 Push People to HubSpot", key=f"push_people_{i}", disabled=not st.session_state.get('hubspot_key')):
+                        with st.spinner("Pushing people to HubSpot..."):
                             try:
-                                people = get_organization_top_people(
-                                    api_key=st.session_state.apollo_key,
-                                    organization_id=org['id']
-                                )
-                                
-                                st.session_state[f"people_{org['id']}"] = people
+                                hubspot_company_id = None
+                                if 'hubspot_company_ids' in st.session_state and i < len(st.session_state.hubspot_company_ids):
+                                    hubspot_company_id = st.session_state.hubspot_company_ids[i]
                                 
-                                if people:
-                                    st.success(f"Found {len(people)} top people!")
-                                    
-                                    for person in people:
-                                        st.write(f"• **{person.get('first_name', '')} {person.get('last_name', '')}** - {person.get('title', 'N/A')}")
-                                        if person.get('email'):
-                                            st.write(f"  📧 {person['email']}")
-                                        if person.get('linkedin_url'):
-                                            st.write(f"  🔗 [LinkedIn]({person['linkedin_url']})")
+                                if hubspot_company_id:
+                                    results = run_async(push_people_to_companies_async(people, hubspot_company_id, st.session_state.hubspot_key, get_http_client()))
+                                    successful = len([r for r in results if 'error' not in r])
+                                    st.success(f"✅ Pushed {successful} people to HubSpot and linked to company!")
                                 else:
-                                    st.info("No top people found for this organization.")
+                                    results = run_async(push_contacts_batch(people, st.session_state.hubspot_key, get_http_client()))
+                                    successful = len([r for r in results if 'error' not in r])
+                                    st.success(f"✅ Pushed {successful} people to HubSpot!")
                                     
                             except Exception as e:
-                                st.error(f"Error getting top people: {str(e)}")
+                                st.error(f"❌ Error pushing people to HubSpot: {str(e)}")
                 
-                if f"people_{org['id']}" in st.session_state:
-                    people = st.session_state[f"people_{org['id']}"]
-                    if people:
-                        st.markdown("**👥 Top People:**")
-                        for person in people:
-                            st.write(f"• **{person.get('first_name', '')} {person.get('last_name', '')}** - {person.get('title', 'N/A')}")
-                            if person.get('email'):
-                                st.write(f"  📧 {person['email']}")
-                            if person.get('linkedin_url'):
-                                st.write(f"  🔗 [LinkedIn]({person['linkedin_url']})")
-                        
-                        with col_btn2:
-                            if st.button(f"📤 Push People to HubSpot", key=f"push_people_{i}", disabled=not st.session_state.get('hubspot_key')):
-                                with st.spinner("Pushing people to HubSpot..."):
-                                    try:
-                                        hubspot_company_id = None
-                                        if 'hubspot_company_ids' in st.session_state and i < len(st.session_state.hubspot_company_ids):
-                                            hubspot_company_id = st.session_state.hubspot_company_ids[i]
-                                        
-                                        if hubspot_company_id:
-                                            results = asyncio.run(push_people_to_companies_async(people, hubspot_company_id, st.session_state.hubspot_key))
-                                            successful = len([r for r in results if 'error' not in r])
-                                            st.success(f"✅ Pushed {successful} people to HubSpot and linked to company!")
-                                        else:
-                                            results = asyncio.run(push_contacts_async(people, st.session_state.hubspot_key))
-                                            successful = len([r for r in results if 'error' not in r])
-                                            st.success(f"✅ Pushed {successful} people to HubSpot!")
-                                            
-                                    except Exception as e:
-                                        st.error(f"❌ Error pushing people to HubSpot: {str(e)}")
-                        
-                        with col_btn3:
-                            if st.button(f"📊 Export People", key=f"export_people_{i}"):
-                                df = pd.DataFrame(people)
-                                csv = df.to_csv(index=False)
-                                st.download_button(
-                                    label="Download People CSV",
-                                    data=csv,
-                                    file_name=f"{org.get('name', 'company')}_people_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                    mime="text/csv"
-                                )
+                with col_btn3:
+                    if st.button(f"📊 Export People", key=f"export_people_{i}"):
+                        df = pd.DataFrame(people)
+                        csv = to_csv_bytes(df)
+                        st.download_button(
+                            label="Download People CSV",
+                            data=csv,
+                            file_name=f"{org.get('name', 'company')}_people_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv"
+                        )
+
+def search_request_error(request: FetchRequest) -> Optional[str]:
+    """Why Apollo would reject or return nothing for this request, checked before any round-trip"""
+    if not request.q_keywords.strip():
+        return "Please enter search keywords."
+    filters = (request.person_titles, request.organization_keywords,
+               request.organization_locations, request.organization_num_employees_ranges)
+    if sum(len(f) for f in filters if f) > MAX_FILTER_VALUES:
+        return f"Too many filters selected. Use at most {MAX_FILTER_VALUES} filter values in total."
+    return None
 
 def contact_search_page():
     """Contact search page with form inputs"""
@@ -662,68 +856,33 @@ def contact_search_page():
         with col2:
             st.subheader("Filters")
 
-            job_titles = [
-                "CEO", "CTO", "CFO", "COO", "President", "Vice President",
-                "Manager", "Project Manager", "Director", "Senior Director",
-                "Software Engineer", "Senior Software Engineer", "Lead Engineer",
-                "Product Manager", "Marketing Manager", "Sales Manager",
-                "Account Manager", "Business Development", "Operations Manager",
-                "HR Manager", "Finance Manager", "General Manager",
-                "Founder", "Co-Founder", "Owner", "Partner", "Consultant",
-                "Analyst", "Specialist", "Coordinator", "Supervisor",
-                "Administrative Assistant", "Executive Assistant"
-            ]
-            
             selected_titles = st.multiselect(
                 "Select Job Titles", 
-                options=job_titles, 
+                options=JOB_TITLE_OPTIONS, 
                 default=[],
                 help="Select job titles to filter contacts by"
             )
             person_titles = selected_titles if selected_titles else None
             
-            industry_keywords = [
-                "Technology", "Software", "SaaS", "Fintech", "Healthcare", "Biotech",
-                "Education", "E-learning", "Finance", "Banking", "Insurance",
-                "Real Estate", "Construction", "Manufacturing", "Retail", "E-commerce",
-                "Media", "Entertainment", "Gaming", "Marketing", "Advertising",
-                "Consulting", "Legal", "Government", "Non-profit", "Energy",
-                "Transportation", "Automotive", "Aerospace", "Telecommunications",
-                "Food & Beverage", "Fashion", "Beauty", "Travel", "Hospitality"
-            ]
-            
             selected_industries = st.multiselect(
                 "Select Industries", 
-                options=industry_keywords, 
+                options=CONTACT_INDUSTRY_OPTIONS, 
                 default=[],
                 help="Select industries to filter organizations by"
             )
             org_keywords = selected_industries if selected_industries else None
             
-            common_locations = [
-                "San Francisco", "New York", "Los Angeles", "Chicago", "Boston", "Seattle",
-                "Austin", "Denver", "Miami", "Atlanta", "Dallas", "Houston", "Phoenix",
-                "Philadelphia", "San Diego", "Portland", "Nashville", "Las Vegas",
-                "Remote", "United States", "Canada", "United Kingdom", "Germany",
-                "France", "Netherlands", "Australia", "Singapore", "India", "Brazil"
-            ]
-            
             selected_locations = st.multiselect(
                 "Select Locations", 
-                options=common_locations, 
+                options=CONTACT_LOCATION_OPTIONS, 
                 default=[],
                 help="Select geographic locations to filter by"
             )
             org_locations = selected_locations if selected_locations else None
             
-            company_sizes = [
-                "1-10", "11-50", "51-200", "201-500", "501-1000", 
-                "1001-5000", "5001-10000", "10000+"
-            ]
-            
             selected_sizes = st.multiselect(
                 "Select Company Sizes", 
-                options=company_sizes, 
+                options=COMPANY_SIZE_OPTIONS, 
                 default=[],
                 help="Select company size ranges to filter by"
             )
@@ -741,7 +900,7 @@ def contact_search_page():
         
         if search_submitted:
             st.session_state.search_submitted = True
-            st.session_state.contacts_data = []  # Clear previous results
+            set_contacts([])  # Clear previous results
     
     if search_submitted and st.session_state.search_submitted:
         if not st.session_state.get('apollo_key'):
@@ -772,10 +931,16 @@ def contact_search_page():
             organization_num_employees_ranges=employee_ranges
         )
         
+        request_error = search_request_error(search_request)
+        if request_error:
+            st.error(request_error)
+            st.session_state.search_submitted = False  # Reset flag
+            return
+        
         with st.spinner("Searching for contacts..."):
             try:
-                contacts = fetch_contacts(search_request)
-                st.session_state.contacts_data = contacts
+                contacts = run_async(fetch_contacts(search_request, get_http_client()))
+                set_contacts(contacts)
                 
                 search_entry = {
                     'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -788,7 +953,8 @@ def contact_search_page():
                         'employee_ranges': employee_ranges
                     }
                 }
-                st.session_state.search_history.insert(0, search_entry)
+                st.session_state.search_history.appendleft(search_entry)
+                st.session_state.search_history_version = uuid.uuid4().hex
                 
                 st.success(f"Found {len(contacts)} contacts!")
                 
@@ -798,6 +964,85 @@ def contact_search_page():
                 st.session_state.search_submitted = False
 
 
+@st.fragment
+def render_results_table(contacts: list, version: str):
+    """Contacts grid and export buttons; grid and export clicks rerun only this block"""
+    df = create_contact_dataframe(contacts, version)
+    
+    if not df.empty:
+        # AgGrid re-sends the whole frame as JSON each rerun; large tables use the Arrow-backed st.dataframe
+        if len(df) < AGGRID_MAX_ROWS and aggrid_available():
+            from st_aggrid import AgGrid, GridOptionsBuilder
+            gb = GridOptionsBuilder.from_dataframe(df)
+            gb.configure_pagination(paginationAutoPageSize=True)
+            gb.configure_side_bar()
+            gb.configure_selection('multiple', use_checkbox=True, groupSelectsChildren=True)
+            gb.configure_default_column(enablePivot=True, enableValue=True, enableRowGroup=True)
+            gridOptions = gb.build()
+            
+            grid_response = AgGrid(
+                df,
+                gridOptions=gridOptions,
+                data_return_mode='AS_INPUT',
+                update_mode='MODEL_CHANGED',
+                fit_columns_on_grid_load=True,
+                theme='alpine',
+                enable_enterprise_modules=True,
+                height=400
+            )
+        else:
+            if len(df) < AGGRID_MAX_ROWS:
+                st.warning("streamlit_aggrid not available. Using basic table display.")
+            st.subheader("📋 Contacts Data")
+            st.dataframe(
+                df,
+                use_container_width=True,
+                height=400
+            )
+        
+        st.markdown("### 📥 Export Data")
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if st.button("📊 Export as CSV"):
+                data, file_name, mime = compressed_download(
+                    contacts_csv(df, version),
+                    f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    "text/csv"
+                )
+                st.download_button(
+                    label="Download CSV",
+                    data=data,
+                    file_name=file_name,
+                    mime=mime
+                )
+        
+        with col2:
+            if st.button("📋 Export as JSON"):
+                data, file_name, mime = compressed_download(
+                    contacts_json(contacts, version),
+                    f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    "application/json"
+                )
+                st.download_button(
+                    label="Download JSON",
+                    data=data,
+                    file_name=file_name,
+                    mime=mime
+                )
+        
+        with col3:
+            if st.button("📧 Export Emails Only"):
+                emails = dict.fromkeys(email.strip().lower() for contact in contacts if (email := contact.get('email')))
+                email_text = '\n'.join(emails)
+                st.download_button(
+                    label="Download Email List",
+                    data=email_text,
+                    file_name=f"emails_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    mime="text/plain"
+                )
+
+
 def results_page():
     """Results display and export page"""
     st.header("📊 Search Results")
@@ -807,7 +1052,8 @@ def results_page():
         st.info("No contacts found. Please perform a search first.")
         return
     
-    display_contact_metrics(contacts)
+    version = st.session_state.contacts_version
+    display_contact_metrics(create_contact_dataframe(contacts, version), version)
     st.markdown("---")
     
     col1, col2, col3 = st.columns(3)
@@ -816,8 +1062,9 @@ def results_page():
         if st.button("✅ Verify Emails", disabled=not st.session_state.get('hunter_key')):
             with st.spinner("Verifying emails..."):
                 try:
-                    verified_contacts = asyncio.run(verify_contacts_async(contacts, st.session_state.hunter_key))
-                    st.session_state.contacts_data = verified_contacts
+                    verified_contacts = run_async(verify_contacts_async(contacts, st.session_state.hunter_key, get_http_client()))
+                    set_contacts(verified_contacts)
+                    contacts = verified_contacts
                     st.success("Email verification completed!")
                 except Exception as e:
                     st.error(f"Error verifying emails: {str(e)}")
@@ -826,7 +1073,7 @@ def results_page():
         if st.button("📤 Push to HubSpot", disabled=not st.session_state.get('hubspot_key')):
             with st.spinner("Pushing to HubSpot..."):
                 try:
-                    hubspot_results = asyncio.run(push_contacts_async(contacts, st.session_state.hubspot_key))
+                    hubspot_results = run_async(push_contacts_batch(contacts, st.session_state.hubspot_key, get_http_client()))
                     st.success(f"Pushed {len(hubspot_results)} contacts to HubSpot!")
                 except Exception as e:
                     st.error(f"Error pushing to HubSpot: {str(e)}")
@@ -838,68 +1085,7 @@ def results_page():
     st.markdown("---")
     
     if contacts:
-        df = create_contact_dataframe(contacts)
-        
-        if not df.empty:
-            if AGGrid_AVAILABLE:
-                gb = GridOptionsBuilder.from_dataframe(df)
-                gb.configure_pagination(paginationAutoPageSize=True)
-                gb.configure_side_bar()
-                gb.configure_selection('multiple', use_checkbox=True, groupSelectsChildren=True)
-                gb.configure_default_column(enablePivot=True, enableValue=True, enableRowGroup=True)
-                gridOptions = gb.build()
-                
-                grid_response = AgGrid(
-                    df,
-                    gridOptions=gridOptions,
-                    data_return_mode='AS_INPUT',
-                    update_mode='MODEL_CHANGED',
-                    fit_columns_on_grid_load=True,
-                    theme='alpine',
-                    enable_enterprise_modules=True,
-                    height=400
-                )
-            else:
-                st.subheader("📋 Contacts Data")
-                st.dataframe(
-                    df,
-                    use_container_width=True,
-                    height=400
-                )
-            
-            st.markdown("### 📥 Export Data")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                if st.button("📊 Export as CSV"):
-                    csv = df.to_csv(index=False)
-                    st.download_button(
-                        label="Download CSV",
-                        data=csv,
-                        file_name=f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv"
-                    )
-            
-            with col2:
-                if st.button("📋 Export as JSON"):
-                    json_data = json.dumps(contacts, indent=2)
-                    st.download_button(
-                        label="Download JSON",
-                        data=json_data,
-                        file_name=f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                        mime="application/json"
-                    )
-            
-            with col3:
-                if st.button("📧 Export Emails Only"):
-                    emails = [contact.get('email', '') for contact in contacts if contact.get('email')]
-                    email_text = '\n'.join(emails)
-                    st.download_button(
-                        label="Download Email List",
-                        data=email_text,
-                        file_name=f"emails_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                        mime="text/plain"
-                    )
+        render_results_table(contacts, st.session_state.contacts_version)
 
 def analytics_page():
     """Analytics and insights page"""
@@ -911,27 +1097,25 @@ def analytics_page():
         st.info("No contacts found. Please perform a search first. Or load the mock CSV from Results & Export.")
         return
 
-    total_contacts = len(contacts)
-    verified_count = len([c for c in contacts if c.get('hunter_result') == 'deliverable'])
-    unique_orgs = len(set([c.get('organization') for c in contacts if c.get('organization')]))
-    scores = [c.get('hunter_score') for c in contacts if isinstance(c.get('hunter_score'), (int, float))]
-    avg_score = (sum(scores) / len(scores)) if scores else None
+    df = create_contact_dataframe(contacts, st.session_state.contacts_version)
+    metrics = contact_metrics(df, st.session_state.contacts_version)
+    avg_score = metrics['score_sum'] / metrics['scored'] if metrics['scored'] else None
 
     k1, k2, k3, k4 = st.columns(4)
-    k1.metric("Total Contacts", f"{total_contacts}")
-    k2.metric("Verified Emails", f"{verified_count}")
-    k3.metric("Unique Organizations", f"{unique_orgs}")
+    k1.metric("Total Contacts", f"{metrics['total']}")
+    k2.metric("Verified Emails", f"{metrics['verified']}")
+    k3.metric("Unique Organizations", f"{metrics['unique_orgs']}")
     k4.metric("Avg Verification Score", f"{avg_score:.1f}" if avg_score is not None else "N/A")
 
     st.markdown("---")
 
-    display_contact_visualizations(contacts)
+    display_contact_visualizations(df, st.session_state.contacts_version)
 
     st.markdown("---")
 
     st.subheader("🔍 Search History")
     if st.session_state.search_history:
-        history_df = pd.DataFrame(st.session_state.search_history)
+        history_df = history_dataframe(st.session_state.search_history, st.session_state.search_history_version)
         st.dataframe(history_df, use_container_width=True)
     else:
         st.info("No search history available.")
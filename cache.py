@@ -0,0 +1,58 @@
+from collections import OrderedDict
+import threading
+import hashlib
+import json
+import time
+import os
+
+APOLLO_CACHE_TTL = int(os.getenv("APOLLO_CACHE_TTL", 7 * 24 * 60 * 60))
+HUNTER_CACHE_TTL = int(os.getenv("HUNTER_CACHE_TTL", 24 * 60 * 60))
+# Contact pages carry personal data, so they are kept for much less time than organization lookups
+APOLLO_CONTACTS_CACHE_TTL = int(os.getenv("APOLLO_CONTACTS_CACHE_TTL", 60 * 60))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 4096))
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def make_key(endpoint, params):
+    """Stable cache key for an endpoint and its request params"""
+    raw = endpoint + json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return value
+
+
+def set(key, value, ttl):
+    with _lock:
+        _entries[key] = (time.monotonic() + ttl, value)
+        _entries.move_to_end(key)
+        while len(_entries) > CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+async def cached(key, ttl, coro_factory, bypass=False):
+    """Return the cached value for key, or await coro_factory() and cache it"""
+    if not bypass:
+        value = get(key)
+        if value is not None:
+            return value
+    value = await coro_factory()
+    set(key, value, ttl)
+    return value
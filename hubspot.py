@@ -1,280 +1,358 @@
-import asyncio
-import httpx
+from utils import http_client, send_with_retry, gather_limited, RATE_LIMIT_STATUSES
+from functools import lru_cache
+import logging
 import json
+import re
+import orjson
+import os
 
 HUBSPOT_BASE = "https://api.hubapi.com"
 HUBSPOT_CONTACTS_BASE = f"{HUBSPOT_BASE}/crm/v3/objects/contacts"
 HUBSPOT_COMPANIES_BASE = f"{HUBSPOT_BASE}/crm/v3/objects/companies"
 HUBSPOT_ASSOCIATIONS_BASE = f"{HUBSPOT_BASE}/crm/v4/associations/contacts/companies/batch/create"
+HUBSPOT_CONTACTS_BATCH_CREATE = f"{HUBSPOT_CONTACTS_BASE}/batch/create"
+HUBSPOT_COMPANIES_BATCH_CREATE = f"{HUBSPOT_COMPANIES_BASE}/batch/create"
+HUBSPOT_BATCH_SIZE = 100
+HUBSPOT_CONCURRENCY = int(os.getenv("HUBSPOT_CONCURRENCY", 5))
+# A whole batch is rejected with these when a single record is invalid (400) or a duplicate (409)
+BATCH_FALLBACK_STATUSES = (400, 409)
+# HubSpot reports per-record batch errors as {"status": "error", "category": ...}
+BATCH_ERROR_CATEGORY_STATUSES = {"CONFLICT": 409, "OBJECT_NOT_FOUND": 404, "RATE_LIMITS": 429}
 
+log = logging.getLogger(__name__)
 
-async def push_contact(contact, api_key):
-    """Push a single contact to HubSpot - only sends non-None values"""
-    headers = {
+
+NULL_STRINGS = frozenset({"none", "null"})
+DOMAIN_RE = re.compile(r"^(?:https?://)?(?:www\.)?([^/?#]+)", re.IGNORECASE)
+
+
+def as_str(value):
+    return str(value) if value else None
+
+
+def stripped(value):
+    if not value:
+        return None
+    return str(value).strip() or None
+
+
+def clean_str(value):
+    """Stripped string, skipping placeholder values like 'None' / 'null'"""
+    value = stripped(value)
+    if value and value.lower() not in NULL_STRINGS:
+        return value
+    return None
+
+
+def extract_domain(value):
+    value = stripped(value)
+    if not value:
+        return None
+    return domain_of(value)
+
+
+@lru_cache(maxsize=4096)
+def domain_of(website_url):
+    match = DOMAIN_RE.match(website_url)
+    return match.group(1) if match else None
+
+
+# (source field, HubSpot property) - set contact fields are sent as strings
+CONTACT_FIELDS = (
+    ("email", "email"),
+    ("first_name", "firstname"),
+    ("last_name", "lastname"),
+    ("phone", "phone"),
+    ("title", "jobtitle"),
+)
+
+# (source field, HubSpot property, converter) - converters return None to skip the property
+COMPANY_SPEC = (
+    ("name", "name", stripped),
+    ("website_url", "website", stripped),
+    ("website_url", "domain", extract_domain),
+    ("phone", "phone", clean_str),
+    ("city", "city", clean_str),
+    ("state", "state", clean_str),
+    ("country", "country", clean_str),
+    ("industry", "industry", clean_str),
+    ("estimated_num_employees", "numberofemployees", as_str),
+)
+
+
+def build_properties(record, spec):
+    """Map a record to HubSpot properties - only sends non-None values"""
+    return {dst: value for src, dst, convert in spec if (value := convert(record.get(src))) is not None}
+
+
+def build_contact_properties(contact):
+    """Contact fast path: skip unset fields before converting, no per-field converter call"""
+    get = contact.get
+    return {dst: str(value) for src, dst in CONTACT_FIELDS if (value := get(src))}
+
+
+def build_company_properties(company):
+    return build_properties(company, COMPANY_SPEC)
+
+
+def with_valid_email(records):
+    """Records with a usable email, normalized to stripped lowercase - validate once per batch"""
+    valid = []
+    for r in records:
+        email = r.get("email")
+        if isinstance(email, str) and "@" in email:
+            valid.append({**r, "email": email.strip().lower()})
+    return valid
+
+
+def has_name(company):
+    name = company.get("name")
+    return bool(name and str(name).strip())
+
+
+def hubspot_headers(api_key):
+    """Request headers for a HubSpot private app token - build once per batch"""
+    return {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
-    
-    properties = {}
-    
-    if contact.get("email"):
-        properties["email"] = contact["email"]
-    if contact.get("first_name"):
-        properties["firstname"] = contact["first_name"]
-    if contact.get("last_name"):
-        properties["lastname"] = contact["last_name"]
-    if contact.get("phone"):
-        properties["phone"] = str(contact["phone"])
-    if contact.get("title"):
-        properties["jobtitle"] = contact["title"]
-    
-    if not properties.get("email"):
-        return {"error": "Email is required", "status": 400, "contact": contact}
-    
-    data = {"properties": properties}
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
+
+
+def batch_errors(errors, chunk, key):
+    """One error entry per failed record, matched back to its input through objectWriteTraceId"""
+    entries = []
+    for e in errors:
+        category = e.get("category")
+        error = {"error": e.get("message"), "status": BATCH_ERROR_CATEGORY_STATUSES.get(category, 400), "category": category}
+        trace_ids = (e.get("context") or {}).get("objectWriteTraceId") or []
+        rows = [chunk[int(i)] for i in trace_ids if str(i).isdigit() and int(i) < len(chunk)]
+        if rows:
+            entries.extend({**error, key: r.get(key)} for r in rows)
+        else:
+            entries.append(error)
+    return entries
+
+
+async def push_batch(url, records, properties, api_key, client, key, push_one):
+    """
+    Create records through a HubSpot batch/create endpoint, 100 per request.
+    Returns one result per created record and one error entry per failed one;
+    `key` picks the record field used to label errors. HubSpot rejects a whole
+    batch over a single invalid or duplicate record, so such a chunk is retried
+    one record at a time with `push_one(record, headers, client)`.
+    """
+    headers = hubspot_headers(api_key)
+
+    async def push_chunk(chunk):
+        data = {"inputs": [{"properties": properties(r), "objectWriteTraceId": str(i)} for i, r in enumerate(chunk)]}
         try:
-            res = await client.post(HUBSPOT_CONTACTS_BASE, json=data, headers=headers)
-            
-            if res.status_code not in [200, 201]:
+            res = await send_with_retry(lambda: client.post(url, content=orjson.dumps(data), headers=headers), RATE_LIMIT_STATUSES)
+
+            if res.status_code in BATCH_FALLBACK_STATUSES:
+                log.debug("Batch of %d rejected [%s], pushing records one by one", len(chunk), res.status_code)
+                return await gather_limited([push_one(r, headers, client) for r in chunk], HUBSPOT_CONCURRENCY)
+
+            if res.status_code not in [200, 201, 207]:
                 error_detail = res.text
                 try:
-                    error_json = res.json()
+                    error_json = orjson.loads(res.content)
                     error_detail = error_json.get("message", res.text)
                 except json.JSONDecodeError:
                     pass
-                    
+
                 if res.status_code == 401:
                     error_detail = "Invalid HubSpot API Key or token expired. Check Authorization scopes."
+
+                log.debug("Failed batch of %d [%s] %s", len(chunk), res.status_code, error_detail[:100])
+                return [{"error": error_detail, "status": res.status_code, key: r.get(key)} for r in chunk]
+
+            result = orjson.loads(res.content)
+            return result.get("results", []) + batch_errors(result.get("errors", []), chunk, key)
+        except Exception as e:
+            return [{"error": f"Exception: {str(e)}", "status": 500, key: r.get(key)} for r in chunk]
+
+    chunks = [records[i:i + HUBSPOT_BATCH_SIZE] for i in range(0, len(records), HUBSPOT_BATCH_SIZE)]
+    async with http_client(client) as client:
+        results = await gather_limited([push_chunk(c) for c in chunks], HUBSPOT_CONCURRENCY)
+    return [r for chunk_results in results for r in chunk_results]
+
+
+async def push_contact(contact, headers, client):
+    """Push a single, already validated contact to HubSpot - only sends non-None values"""
+    data = {"properties": build_contact_properties(contact)}
+    
+    try:
+        res = await send_with_retry(lambda: client.post(HUBSPOT_CONTACTS_BASE, content=orjson.dumps(data), headers=headers), RATE_LIMIT_STATUSES)
+        
+        if res.status_code not in [200, 201]:
+            error_detail = res.text
+            try:
+                error_json = orjson.loads(res.content)
+                error_detail = error_json.get("message", res.text)
+            except json.JSONDecodeError:
+                pass
                 
-                print(f"❌ Failed Contact: {contact.get('email')} [{res.status_code}] {error_detail[:100]}")
-                return {"error": error_detail, "status": res.status_code, "email": contact.get("email")}
+            if res.status_code == 401:
+                error_detail = "Invalid HubSpot API Key or token expired. Check Authorization scopes."
             
-            return res.json()
-        except Exception as e:
-            return {"error": f"Exception: {str(e)}", "status": 500, "email": contact.get("email")}
+            log.debug("Failed contact %s [%s] %s", contact.get("email"), res.status_code, error_detail[:100])
+            return {"error": error_detail, "status": res.status_code, "email": contact.get("email")}
+        
+        return orjson.loads(res.content)
+    except Exception as e:
+        return {"error": f"Exception: {str(e)}", "status": 500, "email": contact.get("email")}
 
 
-async def push_contacts_async(contacts, api_key):
+async def push_contacts_async(contacts, api_key, client=None):
     """Push multiple contacts to HubSpot"""
     if not contacts:
         return []
-    valid_contacts = [c for c in contacts if c.get("email")]
+    valid_contacts = with_valid_email(contacts)
     if not valid_contacts:
         return [{"error": "No contacts with email found", "status": 400}]
-    tasks = [push_contact(c, api_key) for c in valid_contacts]
-    return await asyncio.gather(*tasks)
+    async with http_client(client) as client:
+        headers = hubspot_headers(api_key)
+        tasks = [push_contact(c, headers, client) for c in valid_contacts]
+        return await gather_limited(tasks, HUBSPOT_CONCURRENCY)
 
 
-async def push_company(company, api_key):
+async def push_contacts_batch(contacts, api_key, client=None):
+    """Push multiple contacts to HubSpot through the batch create endpoint"""
+    if not contacts:
+        return []
+    valid_contacts = with_valid_email(contacts)
+    if not valid_contacts:
+        return [{"error": "No contacts with email found", "status": 400}]
+    return await push_batch(HUBSPOT_CONTACTS_BATCH_CREATE, valid_contacts, build_contact_properties, api_key, client, "email", push_contact)
+
+
+async def push_company(company, headers, client):
     """
-    Push a single company to HubSpot.
+    Push a single, already validated company to HubSpot.
     CRITICAL: Only sends non-None values to avoid HubSpot API errors.
     """
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
     company_name = company.get("name")
-    if not company_name or str(company_name).strip() == "":
-        return {"error": "Company name is required", "status": 400, "company": company}
+    data = {"properties": build_company_properties(company)}
 
-    properties = {"name": str(company_name).strip()}
-    
-    website_url = company.get("website_url")
-    if website_url and str(website_url).strip():
-        website_url = str(website_url).strip()
-        properties["website"] = website_url
+    try:
+        res = await send_with_retry(lambda: client.post(HUBSPOT_COMPANIES_BASE, content=orjson.dumps(data), headers=headers), RATE_LIMIT_STATUSES)
         
-        domain = (
-            website_url.replace("https://", "")
-            .replace("http://", "")
-            .replace("www.", "")
-            .split("/")[0]
-        )
-        if domain:
-            properties["domain"] = domain
-    
-    if company.get("phone"):
-        phone = str(company["phone"]).strip()
-        if phone and phone.lower() not in ["none", "null", ""]:
-            properties["phone"] = phone
-    
-    if company.get("city"):
-        city = str(company["city"]).strip()
-        if city and city.lower() not in ["none", "null", ""]:
-            properties["city"] = city
-    
-    if company.get("state"):
-        state = str(company["state"]).strip()
-        if state and state.lower() not in ["none", "null", ""]:
-            properties["state"] = state
-    
-    if company.get("country"):
-        country = str(company["country"]).strip()
-        if country and country.lower() not in ["none", "null", ""]:
-            properties["country"] = country
-    
-    if company.get("industry"):
-        industry = str(company["industry"]).strip()
-        if industry and industry.lower() not in ["none", "null", ""]:
-            properties["industry"] = industry
-    
-    if company.get("estimated_num_employees") is not None:
-        employees = company["estimated_num_employees"]
-        if employees:
-            properties["numberofemployees"] = str(employees)
-
-    data = {"properties": properties}
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            res = await client.post(HUBSPOT_COMPANIES_BASE, json=data, headers=headers)
-            
-            if res.status_code not in [200, 201]:
-                error_detail = res.text
-                try:
-                    error_json = res.json()
-                    error_detail = error_json.get("message", error_detail)
-                    
-                    if res.status_code == 401:
-                        error_detail = "Invalid HubSpot API Key or token expired. Check Authorization scopes."
-                    elif res.status_code == 403:
-                        error_detail = f"Missing required HubSpot permission (scope): {error_detail}"
-                    elif res.status_code == 409 or "DUPLICATE" in error_detail.upper():
-                        error_detail = f"Company '{company_name}' already exists (duplicate by domain/name)."
-                        
-                except json.JSONDecodeError:
-                    pass 
+        if res.status_code not in [200, 201]:
+            error_detail = res.text
+            try:
+                error_json = orjson.loads(res.content)
+                error_detail = error_json.get("message", error_detail)
+                
+                if res.status_code == 401:
+                    error_detail = "Invalid HubSpot API Key or token expired. Check Authorization scopes."
+                elif res.status_code == 403:
+                    error_detail = f"Missing required HubSpot permission (scope): {error_detail}"
+                elif res.status_code == 409 or "DUPLICATE" in error_detail.upper():
+                    error_detail = f"Company '{company_name}' already exists (duplicate by domain/name)."
                     
-                print(f"❌ Failed: {company_name} [{res.status_code}] {error_detail[:100]}")
-                return {"error": error_detail, "status": res.status_code, "company": company_name}
-            
-            result = res.json()
-            print(f"✅ Success: {company_name} (ID: {result.get('id')})")
-            return result
-            
-        except Exception as e:
-            print(f"❌ Exception: {company_name} - {str(e)}")
-            return {"error": f"Exception: {str(e)}", "status": 500, "company": company_name}
+            except json.JSONDecodeError:
+                pass 
+                
+            log.debug("Failed company %s [%s] %s", company_name, res.status_code, error_detail[:100])
+            return {"error": error_detail, "status": res.status_code, "company": company_name}
+        
+        result = orjson.loads(res.content)
+        return result
+        
+    except Exception as e:
+        log.debug("Exception pushing company %s: %s", company_name, e)
+        return {"error": f"Exception: {str(e)}", "status": 500, "company": company_name}
 
 
-async def push_companies_async(companies, api_key):
+async def push_companies_async(companies, api_key, client=None):
     """Push multiple companies to HubSpot"""
     if not companies:
-        print("❌ No companies provided")
+        log.info("No companies provided")
         return []
     
-    print(f"\n{'='*60}")
-    print(f"📊 HUBSPOT PUSH STARTED")
-    print(f"{'='*60}")
-    print(f"Total companies: {len(companies)}")
-    
-    valid_companies = [c for c in companies if c.get("name") and str(c.get("name")).strip()]
-    print(f"Valid companies (with name): {len(valid_companies)}")
+    valid_companies = [c for c in companies if has_name(c)]
     
     if not valid_companies:
-        print("❌ No valid companies found!")
-        if companies:
-            print(f"Example company: {companies[0]}")
+        log.info("No valid companies found among %d (example: %s)", len(companies), companies[0])
         return [{"error": "No valid companies (missing 'name')", "status": 400}]
     
-    print(f"First company: {valid_companies[0].get('name')}\n")
-    
-    tasks = [push_company(c, api_key) for c in valid_companies]
-    results = await asyncio.gather(*tasks)
+    async with http_client(client) as client:
+        headers = hubspot_headers(api_key)
+        tasks = [push_company(c, headers, client) for c in valid_companies]
+        results = await gather_limited(tasks, HUBSPOT_CONCURRENCY)
     
-    successful = [r for r in results if 'error' not in r and r.get('id')]
+    successful = sum(1 for r in results if 'error' not in r and r.get('id'))
     failed = [r for r in results if 'error' in r]
     
-    print(f"\n{'='*60}")
-    print(f"📊 HUBSPOT PUSH COMPLETED")
-    print(f"{'='*60}")
-    print(f"✅ Successful: {len(successful)}")
-    print(f"❌ Failed: {len(failed)}")
-    
-    if failed:
-        print(f"\n❌ Failed companies:")
-        for i, fail in enumerate(failed[:3], 1):
-            print(f"  {i}. {fail.get('company', 'Unknown')}: {fail.get('error', 'Unknown')[:80]}")
-    
-    print(f"{'='*60}\n")
+    log.info("HubSpot company push complete: total=%d valid=%d ok=%d failed=%d",
+             len(companies), len(valid_companies), successful, len(failed))
+    for fail in failed[:3]:
+        log.info("Failed company %s: %s", fail.get('company', 'Unknown'), str(fail.get('error', 'Unknown'))[:80])
     
     return results
 
 
-async def push_person_to_company(person, company_id, api_key):
-    """Create a contact and associate with a company"""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
+async def push_companies_batch(companies, api_key, client=None):
+    """Push multiple companies to HubSpot through the batch create endpoint"""
+    if not companies:
+        return []
+    valid_companies = [c for c in companies if has_name(c)]
+    if not valid_companies:
+        return [{"error": "No valid companies (missing 'name')", "status": 400}]
+    return await push_batch(HUBSPOT_COMPANIES_BATCH_CREATE, valid_companies, build_company_properties, api_key, client, "name", push_company)
 
-    properties = {}
-    if person.get("email"):
-        properties["email"] = person["email"]
-    if person.get("first_name"):
-        properties["firstname"] = person["first_name"]
-    if person.get("last_name"):
-        properties["lastname"] = person["last_name"]
-    if person.get("phone"):
-        properties["phone"] = str(person["phone"])
-    if person.get("title"):
-        properties["jobtitle"] = person["title"]
-    
-    if not properties.get("email"):
-        return {"error": "Email required", "status": 400, "person": f"{person.get('first_name', '')} {person.get('last_name', '')}"}
 
-    contact_data = {"properties": properties}
+async def push_person_to_company(person, company_id, headers, client):
+    """Create an already validated contact and associate with a company"""
+    contact_data = {"properties": build_contact_properties(person)}
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            contact_res = await client.post(HUBSPOT_CONTACTS_BASE, json=contact_data, headers=headers)
-            
-            if contact_res.status_code not in [200, 201]:
-                error_detail = contact_res.text
-                try:
-                    error_json = contact_res.json()
-                    error_detail = error_json.get("message", error_detail)
-                    
-                    if contact_res.status_code == 401:
-                        error_detail = "Invalid HubSpot API Key or token expired. Check Authorization scopes."
-                    
-                except json.JSONDecodeError:
-                    pass
-                    
-                print(f"❌ Failed Contact: {person.get('email')} [{contact_res.status_code}] {error_detail[:100]}")
-                return {"error": error_detail, "status": contact_res.status_code, "person": f"{person.get('first_name', '')} {person.get('last_name', '')}"}
-            
-            contact_json = contact_res.json()
-            contact_id = contact_json.get("id")
-
-            if company_id and contact_id:
-                assoc_data = {
-                    "inputs": [{
-                        "from": {"id": contact_id},
-                        "to": {"id": company_id},
-                        "type": "contact_to_company"
-                    }]
-                }
-                assoc_res = await client.post(HUBSPOT_ASSOCIATIONS_BASE, json=assoc_data, headers=headers)
-                if assoc_res.status_code not in [200, 201, 207]:  
-                    return {"warning": f"Contact created but association failed: {assoc_res.text}", "contact_id": contact_id}
-
-            return contact_json
-            
-        except Exception as e:
-            return {"error": f"Exception: {str(e)}", "status": 500, "person": f"{person.get('first_name', '')} {person.get('last_name', '')}"}
+    try:
+        contact_res = await send_with_retry(lambda: client.post(HUBSPOT_CONTACTS_BASE, content=orjson.dumps(contact_data), headers=headers), RATE_LIMIT_STATUSES)
+        
+        if contact_res.status_code not in [200, 201]:
+            error_detail = contact_res.text
+            try:
+                error_json = orjson.loads(contact_res.content)
+                error_detail = error_json.get("message", error_detail)
+                
+                if contact_res.status_code == 401:
+                    error_detail = "Invalid HubSpot API Key or token expired. Check Authorization scopes."
+                
+            except json.JSONDecodeError:
+                pass
+                
+            log.debug("Failed contact %s [%s] %s", person.get("email"), contact_res.status_code, error_detail[:100])
+            return {"error": error_detail, "status": contact_res.status_code, "person": f"{person.get('first_name', '')} {person.get('last_name', '')}"}
+        
+        contact_json = orjson.loads(contact_res.content)
+        contact_id = contact_json.get("id")
+
+        if company_id and contact_id:
+            assoc_data = {
+                "inputs": [{
+                    "from": {"id": contact_id},
+                    "to": {"id": company_id},
+                    "type": "contact_to_company"
+                }]
+            }
+            assoc_res = await send_with_retry(lambda: client.post(HUBSPOT_ASSOCIATIONS_BASE, content=orjson.dumps(assoc_data), headers=headers), RATE_LIMIT_STATUSES)
+            if assoc_res.status_code not in [200, 201, 207]:  
+                return {"warning": f"Contact created but association failed: {assoc_res.text}", "contact_id": contact_id}
+
+        return contact_json
+        
+    except Exception as e:
+        return {"error": f"Exception: {str(e)}", "status": 500, "person": f"{person.get('first_name', '')} {person.get('last_name', '')}"}
 
 
-async def push_people_to_companies_async(people, company_id, api_key):
+async def push_people_to_companies_async(people, company_id, api_key, client=None):
     """Push multiple people and associate with company"""
     if not people:
         return []
-    valid_people = [p for p in people if p.get("email")]
+    valid_people = with_valid_email(people)
     if not valid_people:
         return [{"error": "No people with email", "status": 400}]
-    tasks = [push_person_to_company(p, company_id, api_key) for p in valid_people]
-    return await asyncio.gather(*tasks)
+    async with http_client(client) as client:
+        headers = hubspot_headers(api_key)
+        tasks = [push_person_to_company(p, company_id, headers, client) for p in valid_people]
+        return await gather_limited(tasks, HUBSPOT_CONCURRENCY)
@@ -1,24 +1,107 @@
+from cache import HUNTER_CACHE_TTL
+from utils import http_client, send_with_retry, gather_limited
 import asyncio
-import httpx
+import cache
+import os
+import orjson
+
+HUNTER_VERIFY_URL = "https://api.hunter.io/v2/email-verifier"
+HUNTER_CONCURRENCY = int(os.getenv("HUNTER_CONCURRENCY", 10))
+
+async def verify_email(email, api_key, client):
+    key = cache.make_key(HUNTER_VERIFY_URL, {"email": email.lower()})
+    cached_result = cache.get(key)
+    if cached_result is not None:
+        return cached_result
 
-async def verify_email(email, api_key):
-    url = "https://api.hunter.io/v2/email-verifier"
     params = {"email": email, "api_key": api_key}
 
-    async with httpx.AsyncClient() as client:
-        r = await client.get(url, params=params)
-        if r.status_code == 200:
-            return r.json().get("data", {})
-        return {"error": r.text, "email": email}
+    r = await send_with_retry(lambda: client.get(HUNTER_VERIFY_URL, params=params))
+    if r.status_code == 200:
+        result = orjson.loads(r.content).get("data", {})
+        cache.set(key, result, HUNTER_CACHE_TTL)
+        return result
+    return {"error": r.text, "email": email}
+
+# Apollo has already checked these, so they skip the Hunter call
+APOLLO_VERIFIED_RESULT = {"result": "deliverable"}
+
+def with_hunter_result(contact, hunter_data, source="hunter"):
+    """`verification_source` tells Hunter verdicts apart from Apollo's, which have no score or SMTP check"""
+    return {**contact,
+            "hunter_result": hunter_data.get("result"),
+            "hunter_score": hunter_data.get("score"),
+            "smtp_check": hunter_data.get("smtp_check"),
+            "verification_source": source}
+
+def with_apollo_result(contact):
+    return with_hunter_result(contact, APOLLO_VERIFIED_RESULT, "apollo")
+
+async def aiter_contacts(contacts):
+    if hasattr(contacts, "__aiter__"):
+        async for c in contacts:
+            yield c
+    else:
+        for c in contacts:
+            yield c
 
-async def verify_contacts_async(contacts, api_key):
-    tasks = [verify_email(c["email"], api_key) for c in contacts if c.get("email")]
-    results = await asyncio.gather(*tasks)
+async def verification_plan(contacts):
+    """
+    Contacts with an email, in order, each paired with the lowercased email to check
+    with Hunter - or None when Apollo has already verified it.
+    """
+    async for c in aiter_contacts(contacts):
+        if c.get("email"):
+            yield c, None if c.get("email_status") == "verified" else c["email"].lower()
+
+async def verify_contacts_async(contacts, api_key, client=None):
+    plan = [step async for step in verification_plan(contacts)]
+    to_check = list(dict.fromkeys(email for _, email in plan if email))
+    async with http_client(client) as client:
+        tasks = [verify_email(email, api_key, client) for email in to_check]
+        results = dict(zip(to_check, await gather_limited(tasks, HUNTER_CONCURRENCY)))
     
-    verified_contacts = []
-    for contact, hunter_data in zip([c for c in contacts if c.get("email")], results):
-        verified_contacts.append({**contact,
-                                  "hunter_result": hunter_data.get("result"),
-                                  "hunter_score": hunter_data.get("score"),
-                                  "smtp_check": hunter_data.get("smtp_check")})
-    return verified_contacts
\ No newline at end of file
+    return [with_hunter_result(c, results[email]) if email else with_apollo_result(c) for c, email in plan]
+
+async def verify_contacts_as_completed(contacts, api_key, client=None):
+    """
+    Yield each verified contact as soon as its Hunter check finishes.
+    `contacts` can be a list or an async iterator (e.g. apollo.iter_contacts),
+    in which case verification starts while contacts are still arriving.
+    """
+    semaphore = asyncio.Semaphore(HUNTER_CONCURRENCY)
+    ready = asyncio.Queue()
+    waiting = {}
+    results = {}
+
+    async def verify_group(email):
+        async with semaphore:
+            hunter_data = await verify_email(email, api_key, client)
+        results[email] = hunter_data
+        for c in waiting.pop(email):
+            ready.put_nowait(with_hunter_result(c, hunter_data))
+
+    async def feed():
+        try:
+            async with asyncio.TaskGroup() as tg:
+                async for c, email in verification_plan(contacts):
+                    if email is None:
+                        ready.put_nowait(with_apollo_result(c))
+                    elif email in results:
+                        ready.put_nowait(with_hunter_result(c, results[email]))
+                    elif email in waiting:
+                        waiting[email].append(c)
+                    else:
+                        waiting[email] = [c]
+                        tg.create_task(verify_group(email))
+        finally:
+            ready.put_nowait(None)
+
+    async with http_client(client) as client:
+        feeder = asyncio.create_task(feed())
+        try:
+            while (contact := await ready.get()) is not None:
+                yield contact
+            await feeder
+        finally:
+            feeder.cancel()
\ No newline at end of file
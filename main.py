@@ -1,23 +1,113 @@
-from hunter import verify_contacts_async
-from hubspot import push_contacts_async
-from apollo import fetch_contacts
+from pipeline import fetch_verify_push, stream_fetch_verify_push
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Depends, Header, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from apollo import iter_contacts
 from models import FetchRequest
-from fastapi import FastAPI
+import logging
 import asyncio
-import re
+import httpx
+import orjson
 
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(name)s - %(message)s")
+log = logging.getLogger(__name__)
 
-app = FastAPI(title="Lead Hunter")
+UPSTREAM_HOSTS = {
+    "apollo": "api.apollo.io",
+    "hunter": "api.hunter.io",
+    "hubspot": "api.hubapi.com"
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *[loop.getaddrinfo(host, 443) for host in UPSTREAM_HOSTS.values()],
+        return_exceptions=True
+    )
+    app.state.clients = {
+        name: httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+        for name in UPSTREAM_HOSTS
+    }
+    try:
+        yield
+    finally:
+        await asyncio.gather(*[client.aclose() for client in app.state.clients.values()])
+
+
+app = FastAPI(title="Lead Hunter", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+
+def apollo_client(request: Request):
+    return request.app.state.clients["apollo"]
+
+
+def hunter_client(request: Request):
+    return request.app.state.clients["hunter"]
+
+
+def hubspot_client(request: Request):
+    return request.app.state.clients["hubspot"]
 
 
 @app.post("/fetch_verify_push_async")
-async def fetch_verify_push_async(data: FetchRequest, hunter_api_key: str, hubspot_api_key: str):
-    contacts = fetch_contacts(data)
-    verified_contacts = await verify_contacts_async(contacts, hunter_api_key)
-    hubspot_results = await push_contacts_async(verified_contacts, hubspot_api_key)
+async def fetch_verify_push_async(
+    data: FetchRequest,
+    hunter_api_key: str = Header(...),
+    hubspot_api_key: str = Header(...),
+    apollo: httpx.AsyncClient = Depends(apollo_client),
+    hunter: httpx.AsyncClient = Depends(hunter_client),
+    hubspot: httpx.AsyncClient = Depends(hubspot_client)
+):
+    contacts = iter_contacts(data, apollo)
+    verified_contacts, hubspot_results = await fetch_verify_push(
+        contacts, hunter_api_key, hubspot_api_key, hunter_client=hunter, hubspot_client=hubspot
+    )
 
     return {
         "total": len(verified_contacts),
         "contacts": verified_contacts,
         "hubspot_results": hubspot_results
-    }
\ No newline at end of file
+    }
+
+
+@app.post("/fetch_verify_push_stream")
+async def fetch_verify_push_stream(
+    data: FetchRequest,
+    hunter_api_key: str = Header(...),
+    hubspot_api_key: str = Header(...),
+    apollo: httpx.AsyncClient = Depends(apollo_client),
+    hunter: httpx.AsyncClient = Depends(hunter_client),
+    hubspot: httpx.AsyncClient = Depends(hubspot_client)
+):
+    """Same pipeline as /fetch_verify_push_async, streamed as NDJSON events while they happen"""
+    contacts = iter_contacts(data, apollo)
+    events = stream_fetch_verify_push(
+        contacts, hunter_api_key, hubspot_api_key, hunter_client=hunter, hubspot_client=hubspot
+    )
+
+    # Wait for the first event before answering, so an early failure (e.g. a bad Apollo key) keeps its status code
+    first = await anext(events, None)
+
+    async def ndjson():
+        if first is None:
+            return
+        try:
+            yield orjson.dumps(first) + b"\n"
+            async for event in events:
+                yield orjson.dumps(event) + b"\n"
+        except HTTPException as error:
+            # The 200 is already sent, so the failure goes out as the last line
+            yield orjson.dumps({"error": error.detail, "status": error.status_code}) + b"\n"
+        except Exception as error:
+            log.exception("Pipeline stream failed")
+            yield orjson.dumps({"error": str(error), "status": 500}) + b"\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
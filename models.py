@@ -1,22 +1,29 @@
-from typing import Optional, List
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
 
 class FetchRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     api_key: str
     total_records: int = 1
     per_page: Optional[int] = 1
     start_page: Optional[int] = 1
     q_keywords: str 
-    person_titles: Optional[List[str]] = None
-    organization_keywords: Optional[List[str]] = None
-    organization_locations: Optional[List[str]] = None
-    organization_num_employees_ranges: Optional[List[str]] = None
+    person_titles: Optional[tuple[str, ...]] = None
+    organization_keywords: Optional[tuple[str, ...]] = None
+    organization_locations: Optional[tuple[str, ...]] = None
+    organization_num_employees_ranges: Optional[tuple[str, ...]] = None
+    cache_bypass: bool = False
 
 class SimpleContact(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     id: str
     email: str
 
 class NLQuery(BaseModel):
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
     query: str
     api_key: str
     total_records: int = 10
\ No newline at end of file
@@ -0,0 +1,103 @@
+from hubspot import push_contacts_batch, HUBSPOT_BATCH_SIZE
+from hunter import verify_contacts_as_completed, aiter_contacts
+from contextlib import suppress
+import asyncio
+
+PUSH_FLUSH_INTERVAL = 0.5
+PIPELINE_QUEUE_SIZE = 32
+
+
+def root_cause(error):
+    """The first leaf of a TaskGroup's (possibly nested) ExceptionGroup, e.g. Apollo's HTTPException"""
+    while isinstance(error, BaseExceptionGroup):
+        error = error.exceptions[0]
+    return error
+
+
+async def drain(queue):
+    """Iterate a pipeline queue until its None sentinel"""
+    while (item := await queue.get()) is not None:
+        yield item
+
+
+async def stream_fetch_verify_push(contacts, hunter_api_key, hubspot_api_key, hunter_client=None, hubspot_client=None):
+    """
+    Stream contacts through fetch -> Hunter verify -> HubSpot push.
+    The three stages run concurrently in one TaskGroup, linked by bounded queues,
+    so while later Apollo pages are still arriving earlier contacts are being
+    verified and pushed. `contacts` is a list or an async iterator such as
+    apollo.iter_contacts. Pushes go out in batches of up to HUBSPOT_BATCH_SIZE,
+    or whatever was verified within PUSH_FLUSH_INTERVAL seconds.
+    Yields {"contact": ...} as each contact is verified and
+    {"hubspot_result": ...} as each push result comes back.
+    """
+    fetched = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    verified = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    events = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+
+    async def fetch():
+        async for contact in aiter_contacts(contacts):
+            await fetched.put(contact)
+        await fetched.put(None)
+
+    async def verify():
+        async for contact in verify_contacts_as_completed(drain(fetched), hunter_api_key, hunter_client):
+            await events.put({"contact": contact})
+            await verified.put(contact)
+        await verified.put(None)
+
+    async def push():
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            batch = []
+            deadline = loop.time() + PUSH_FLUSH_INTERVAL
+            while len(batch) < HUBSPOT_BATCH_SIZE:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        contact = await verified.get()
+                except TimeoutError:
+                    break
+                if contact is None:
+                    done = True
+                    break
+                batch.append(contact)
+            if batch:
+                for result in await push_contacts_batch(batch, hubspot_api_key, hubspot_client):
+                    await events.put({"hubspot_result": result})
+
+    async def run():
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(fetch())
+                tg.create_task(verify())
+                tg.create_task(push())
+        except Exception as error:
+            # Hand the failure to the consumer instead of losing it in the background task,
+            # unwrapped so an upstream HTTPException keeps its status code
+            await events.put(root_cause(error))
+            return
+        await events.put(None)
+
+    runner = asyncio.create_task(run())
+    try:
+        while (event := await events.get()) is not None:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+    finally:
+        runner.cancel()
+        with suppress(asyncio.CancelledError):
+            await runner
+
+
+async def fetch_verify_push(contacts, hunter_api_key, hubspot_api_key, hunter_client=None, hubspot_client=None):
+    """Run the pipeline to completion; returns (verified_contacts, hubspot_results)"""
+    verified_contacts = []
+    hubspot_results = []
+    async for event in stream_fetch_verify_push(contacts, hunter_api_key, hubspot_api_key, hunter_client, hubspot_client):
+        if "contact" in event:
+            verified_contacts.append(event["contact"])
+        else:
+            hubspot_results.append(event["hubspot_result"])
+    return verified_contacts, hubspot_results
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+from main import app, apollo_client, hunter_client, hubspot_client
+import httpx
+import orjson
+import cache
+
+API_HEADERS = {"hunter-api-key": "hunter-key", "hubspot-api-key": "hubspot-key"}
+SEARCH = {"api_key": "bad-key", "q_keywords": "saas", "total_records": 5, "per_page": 1}
+
+
+def unauthorized(request):
+    return httpx.Response(401, text="Invalid access credentials.")
+
+
+def post_with_mock_upstreams(path, handler):
+    cache.clear()
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    for dependency in (apollo_client, hunter_client, hubspot_client):
+        app.dependency_overrides[dependency] = lambda: upstream
+    try:
+        return TestClient(app).post(path, json=SEARCH, headers=API_HEADERS)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_apollo_unauthorized_keeps_status():
+    res = post_with_mock_upstreams("/fetch_verify_push_async", unauthorized)
+    assert res.status_code == 401
+    assert "Unauthorized" in res.json()["detail"]
+
+
+def apollo_fails_after_first_page(request):
+    if request.url.host == "api.apollo.io":
+        page = orjson.loads(request.content)["page"]
+        if page > 1:
+            return httpx.Response(401, text="Invalid access credentials.")
+        contact = {"id": "1", "first_name": "Ada", "email": "ada@example.com", "email_status": "verified"}
+        return httpx.Response(200, json={"contacts": [contact], "pagination": {"total_pages": 5}})
+    return httpx.Response(200, json={"results": [{"id": "1"}]})
+
+
+def test_stream_unauthorized_keeps_status():
+    res = post_with_mock_upstreams("/fetch_verify_push_stream", unauthorized)
+    assert res.status_code == 401
+
+
+def test_stream_reports_late_failure_as_last_line():
+    res = post_with_mock_upstreams("/fetch_verify_push_stream", apollo_fails_after_first_page)
+    assert res.status_code == 200
+    events = [orjson.loads(line) for line in res.text.splitlines()]
+    assert events[0]["contact"]["email"] == "ada@example.com"
+    assert events[-1]["status"] == 401
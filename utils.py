@@ -1,21 +1,80 @@
+from contextlib import asynccontextmanager
+import asyncio
+import random
+import httpx
+import time
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RATE_LIMIT_STATUSES = frozenset({429})
+MAX_ATTEMPTS = 5
+MAX_BACKOFF = 30
+
+
+@asynccontextmanager
+async def http_client(client=None):
+    """Yield the shared client if one is given, otherwise a short-lived one"""
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(http2=True, timeout=30.0) as new_client:
+        yield new_client
+
+
+def retry_delay(response, attempt):
+    """Seconds to wait before the next attempt: Retry-After if sent, else exponential backoff with jitter"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), MAX_BACKOFF)
+    return random.uniform(0, min(MAX_BACKOFF, 2 ** attempt))
+
+
+async def send_with_retry(send, retry_statuses=RETRY_STATUSES):
+    """Await send() and retry rate-limited / failed responses; returns the last response"""
+    for attempt in range(MAX_ATTEMPTS):
+        response = await send()
+        if response.status_code not in retry_statuses or attempt == MAX_ATTEMPTS - 1:
+            return response
+        await asyncio.sleep(retry_delay(response, attempt))
+
+
+async def gather_limited(coros, limit):
+    """asyncio.gather with at most `limit` of the coroutines in flight at once"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[bounded(c) for c in coros])
+
+
+def send_with_retry_sync(send, retry_statuses=RETRY_STATUSES):
+    """Blocking counterpart of send_with_retry for the synchronous helpers"""
+    for attempt in range(MAX_ATTEMPTS):
+        response = send()
+        if response.status_code not in retry_statuses or attempt == MAX_ATTEMPTS - 1:
+            return response
+        time.sleep(retry_delay(response, attempt))
+
+
 def extract_contact_info(info):
-    email = info.get("email")
-    phone = info.get("phone")
-    if not phone and info.get("phones"):
-        phone = info["phones"][0].get("number") or info["phones"][0].get("phone")
+    get = info.get
+    account = get("account")
+    phone = get("phone")
+    if not phone and (phones := get("phones")):
+        first_phone = phones[0]
+        phone = first_phone.get("number") or first_phone.get("phone")
     
-    if not phone and info.get("account"):
-        phone = info["account"].get("phone") or info["account"].get("sanitized_phone")
-    
-    organization = info.get("organization") or info.get("organization_name") or (info.get("account") and info["account"].get("name"))
+    if not phone and account:
+        phone = account.get("phone") or account.get("sanitized_phone")
     
     return {
-        "id": info.get("id"),
-        "first_name": info.get("first_name"),
-        "last_name": info.get("last_name"),
-        "title": info.get("title"),
-        "email": email,
+        "id": get("id"),
+        "first_name": get("first_name"),
+        "last_name": get("last_name"),
+        "title": get("title"),
+        "email": get("email"),
         "phone": phone,
-        "email_status": info.get("email_status") or info.get("contact_email_status"),
-        "organization": organization
+        "email_status": get("email_status") or get("contact_email_status"),
+        "organization": get("organization") or get("organization_name") or (account and account.get("name"))
     }